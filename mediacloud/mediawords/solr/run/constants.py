@@ -38,6 +38,14 @@ MC_SOLR_CLUSTER_STARTING_PORT = 7981
 # (might want to make it bigger as a shard could be rebuilding indexes or whatever)
 MC_SOLR_CLUSTER_CONNECT_RETRIES = 10 * 60
 
+# Max. number of concurrent admin requests (collection reloads, index optimizations) to make to Solr
+MC_SOLR_ADMIN_REQUEST_MAX_WORKERS = 8
+
+# Max. number of collections and symlinks to set up concurrently in instance's data directory before starting Solr
+# (both standalone instance and shards; data directory might be on a network filesystem on which every file
+# operation is a round trip)
+MC_SOLR_INSTANCE_SETUP_MAX_WORKERS = 32
+
 # Default ZooKeeper host to connect to
 MC_SOLR_CLUSTER_ZOOKEEPER_HOST = "localhost"
 
@@ -50,6 +58,9 @@ MC_SOLR_CLUSTER_ZOOKEEPER_TIMEOUT = 300000
 # Seconds to wait for external ZooKeeper to start
 MC_SOLR_CLUSTER_ZOOKEEPER_CONNECT_RETRIES = 2 * 60
 
+# Max. number of collection configurations to upload to ZooKeeper concurrently
+MC_SOLR_CLUSTER_ZOOKEEPER_UPLOAD_MAX_WORKERS = 8
+
 # Default JVM heap size (-Xmx) for each shard
 MC_SOLR_CLUSTER_JVM_HEAP_SIZE = "256m"
 
@@ -79,6 +90,9 @@ MC_ZOOKEEPER_SIGKILL_TIMEOUT = 60
 # Timeout for installations (in seconds)
 MC_INSTALL_TIMEOUT = 2 * 60
 
+# Timeout for connecting to and reading from the server that software distributions get downloaded from (in seconds)
+MC_DOWNLOAD_TIMEOUT = 60
+
 # Where to extract software distributions (relative to Media Cloud root; must already exist)
 MC_DIST_DIR = "data/solr/dist/"
 
@@ -4,39 +4,60 @@ import os
 import re
 import shutil
 import signal
+import stat
 import subprocess
 import sys
 import tempfile
-import time
-from typing import Dict, List
-from urllib.error import URLError
-from urllib.request import urlopen
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
 
 from mediawords.solr.run.constants import (
     MC_DIST_DIR, MC_SOLR_VERSION, MC_PACKAGE_INSTALLING_FILE, MC_PACKAGE_INSTALLED_FILE,
-    MC_INSTALL_TIMEOUT, MC_SOLR_HOME_DIR, MC_SOLR_BASE_DATA_DIR, MC_SOLR_CLUSTER_STARTING_PORT,
+    MC_INSTALL_TIMEOUT, MC_DOWNLOAD_TIMEOUT, MC_SOLR_HOME_DIR, MC_SOLR_BASE_DATA_DIR, MC_SOLR_CLUSTER_STARTING_PORT,
     MC_SOLR_CLUSTER_ZOOKEEPER_HOST, MC_SOLR_CLUSTER_ZOOKEEPER_PORT, MC_SOLR_CLUSTER_ZOOKEEPER_TIMEOUT,
     MC_SOLR_SIGKILL_TIMEOUT, MC_SOLR_STANDALONE_JVM_OPTS, MC_SOLR_LUCENEMATCHVERSION, MC_SOLR_STANDALONE_PORT,
     MC_SOLR_STANDALONE_JVM_HEAP_SIZE, MC_SOLR_STANDALONE_CONNECT_RETRIES,
     MC_SOLR_CLUSTER_JVM_HEAP_SIZE, MC_SOLR_CLUSTER_ZOOKEEPER_CONNECT_RETRIES,
-    MC_SOLR_CLUSTER_JVM_OPTS, MC_SOLR_CLUSTER_CONNECT_RETRIES)
-from mediawords.util.compress import extract_tarball_to_directory
+    MC_SOLR_CLUSTER_ZOOKEEPER_UPLOAD_MAX_WORKERS, MC_SOLR_CLUSTER_JVM_OPTS, MC_SOLR_CLUSTER_CONNECT_RETRIES,
+    MC_SOLR_ADMIN_REQUEST_MAX_WORKERS, MC_SOLR_INSTANCE_SETUP_MAX_WORKERS)
+from mediawords.util.compress import extract_tarball_stream_to_directory, McExtractTarballStreamToDirectoryException
 from mediawords.util.log import create_logger
 from mediawords.util.network import fqdn, hostname_resolves, wait_for_tcp_port_to_open, tcp_port_is_open
-from mediawords.util.paths import mkdir_p, resolve_absolute_path_under_mc_root, relative_symlink, lock_file, unlock_file
+from mediawords.util.paths import mkdir_p, resolve_absolute_path_under_mc_root, lock_file, unlock_file
 from mediawords.util.process import run_command_in_foreground, gracefully_kill_child_process
-from mediawords.util.web import download_file_to_temp_path
 
 log = create_logger(__name__)
 
 __solr_pid = None
 
+# Old (pre-ZooKeeper configuration) shard directory name
+__OLD_SHARD_DIR_PREFIX = "mediacloud-shard-"
+__OLD_SHARD_DIR_REGEX = re.compile(r'^mediacloud-shard-(\d+?)$')
+
 
 class McSolrRunException(Exception):
     """Exception of running Solr."""
     pass
 
 
+class _FixedDelayRetry(Retry):
+    """urllib3's Retry which waits for a fixed amount of seconds between attempts instead of backing off
+    exponentially, like "curl --retry-delay" does."""
+
+    # Seconds to wait before every retry
+    RETRY_DELAY = 5
+
+    def get_backoff_time(self) -> float:
+        return float(self.RETRY_DELAY)
+
+
+@lru_cache(maxsize=None)
 def __solr_path(dist_directory: str = MC_DIST_DIR, solr_version: str = MC_SOLR_VERSION) -> str:
     """Return path to where Solr distribution should be located."""
     dist_path = resolve_absolute_path_under_mc_root(path=dist_directory, must_exist=True)
@@ -45,12 +66,14 @@ def __solr_path(dist_directory: str = MC_DIST_DIR, solr_version: str = MC_SOLR_V
     return solr_path
 
 
+@lru_cache(maxsize=None)
 def __solr_installing_file_path(dist_directory: str = MC_DIST_DIR, solr_version: str = MC_SOLR_VERSION) -> str:
     """Return path to file which denotes that Solr is being installed (and thus serves as a lock file)."""
     solr_path = __solr_path(dist_directory=dist_directory, solr_version=solr_version)
     return os.path.join(solr_path, MC_PACKAGE_INSTALLING_FILE)
 
 
+@lru_cache(maxsize=None)
 def __solr_installed_file_path(dist_directory: str = MC_DIST_DIR, solr_version: str = MC_SOLR_VERSION) -> str:
     """Return path to file which denotes that Solr has been installed."""
     solr_path = __solr_path(dist_directory=dist_directory, solr_version=solr_version)
@@ -81,6 +104,33 @@ def __solr_is_installed(dist_directory: str = MC_DIST_DIR, solr_version: str = M
     return False
 
 
+def __download_solr_to_directory(solr_dist_url: str, dest_directory: str) -> None:
+    """Download Solr distribution tarball and extract it to directory."""
+
+    # Extract while downloading instead of writing the tarball to a temporary file and reading it back
+    log.info("Downloading Solr from %s and extracting it to %s..." % (solr_dist_url, dest_directory))
+    try:
+        with requests.Session() as session:
+            # Retry like "curl --retry 3 --retry-delay 5" used to
+            retries = _FixedDelayRetry(total=3, status_forcelist=[500, 502, 503, 504])
+            session.mount('https://', HTTPAdapter(max_retries=retries))
+
+            # Don't wait forever (while holding installation lock) for a stalled connection
+            with session.get(solr_dist_url, stream=True, timeout=MC_DOWNLOAD_TIMEOUT) as solr_dist_response:
+                solr_dist_response.raise_for_status()
+
+                # Read straight from the socket in tarfile's (large) chunks instead of iterating over small ones; don't
+                # let urllib3 decode the body as the tarball is to be gunzipped by tarfile even if the server claims
+                # "Content-Encoding: gzip" for it
+                extract_tarball_stream_to_directory(stream=solr_dist_response.raw,
+                                                    dest_directory=dest_directory,
+                                                    strip_root=True)
+    except (requests.RequestException, Urllib3HTTPError) as ex:
+        raise McSolrRunException("Unable to download Solr from %s: %s" % (solr_dist_url, str(ex)))
+    except McExtractTarballStreamToDirectoryException as ex:
+        raise McSolrRunException("Unable to extract Solr from %s: %s" % (solr_dist_url, str(ex)))
+
+
 def __install_solr(dist_directory: str = MC_DIST_DIR, solr_version: str = MC_SOLR_VERSION) -> None:
     """Install Solr to distribution directory; lock directory before installing and unlock afterwards."""
     if __solr_is_installed(dist_directory=dist_directory, solr_version=solr_version):
@@ -105,13 +155,42 @@ def __install_solr(dist_directory: str = MC_DIST_DIR, solr_version: str = MC_SOL
 
     solr_dist_url = __solr_dist_url(solr_version=solr_version)
 
-    log.info("Downloading Solr %s from %s..." % (solr_version, solr_dist_url))
-    solr_tarball_dest_path = download_file_to_temp_path(solr_dist_url)
-
-    log.info("Extracting %s to %s..." % (solr_tarball_dest_path, solr_path))
-    extract_tarball_to_directory(archive_file=solr_tarball_dest_path,
-                                 dest_directory=solr_path,
-                                 strip_root=True)
+    # Extract to a staging directory next to Solr's one (i.e. on the same filesystem) and move extracted files into
+    # place only after the whole archive got extracted so that a failed download doesn't leave a half-extracted
+    # distribution behind
+    solr_staging_parent_path = os.path.dirname(solr_path)
+    solr_staging_prefix = ".solr-%s-" % solr_version
+
+    # Staging directories of killed installations don't get removed by "finally:" below; installation lock is being
+    # held so no other installation is using them
+    with os.scandir(solr_staging_parent_path) as entries:
+        for entry in entries:
+            if entry.name.startswith(solr_staging_prefix) and entry.is_dir(follow_symlinks=False):
+                log.warning("Removing leftover staging directory '%s' from previous installation attempt..." % (
+                    entry.path
+                ))
+                shutil.rmtree(entry.path)
+
+    solr_staging_path = tempfile.mkdtemp(dir=solr_staging_parent_path, prefix=solr_staging_prefix)
+    try:
+        __download_solr_to_directory(solr_dist_url=solr_dist_url, dest_directory=solr_staging_path)
+
+        log.info("Moving extracted Solr from %s to %s..." % (solr_staging_path, solr_path))
+        with os.scandir(solr_staging_path) as entries:
+            for entry in entries:
+                entry_dst_path = os.path.join(solr_path, entry.name)
+
+                entry_dst_mode = __file_mode(entry_dst_path, follow_symlinks=False)
+                if entry_dst_mode:
+                    log.warning("Removing leftover '%s' from previous installation attempt..." % entry_dst_path)
+                    if stat.S_ISDIR(entry_dst_mode):
+                        shutil.rmtree(entry_dst_path)
+                    else:
+                        os.unlink(entry_dst_path)
+
+                os.rename(entry.path, entry_dst_path)
+    finally:
+        shutil.rmtree(solr_staging_path, ignore_errors=True)
 
     # Solr needs its .war extracted first before ZkCLI is usable
     jetty_home_path = __jetty_home_path(dist_directory=dist_directory, solr_version=solr_version)
@@ -131,12 +210,14 @@ def __install_solr(dist_directory: str = MC_DIST_DIR, solr_version: str = MC_SOL
         raise McSolrRunException("I've done everything but Solr is still not installed.")
 
 
+@lru_cache(maxsize=None)
 def __solr_home_path(solr_home_dir: str = MC_SOLR_HOME_DIR) -> str:
     """Return path to Solr home (with collection subdirectories)."""
     solr_home_path = resolve_absolute_path_under_mc_root(path=solr_home_dir, must_exist=True)
     return solr_home_path
 
 
+@lru_cache(maxsize=None)
 def __jetty_home_path(dist_directory: str = MC_DIST_DIR, solr_version: str = MC_SOLR_VERSION) -> str:
     solr_path = __solr_path(dist_directory=dist_directory, solr_version=solr_version)
 
@@ -147,6 +228,7 @@ def __jetty_home_path(dist_directory: str = MC_DIST_DIR, solr_version: str = MC_
     return jetty_home_path
 
 
+@lru_cache(maxsize=None)
 def __collections_path(solr_home_dir: str = MC_SOLR_HOME_DIR) -> str:
     solr_home_path = __solr_home_path(solr_home_dir=solr_home_dir)
     collections_path = os.path.join(solr_home_path, "collections/")
@@ -156,26 +238,125 @@ def __collections_path(solr_home_dir: str = MC_SOLR_HOME_DIR) -> str:
     return collections_path
 
 
+@lru_cache(maxsize=None)
 def __collections(solr_home_dir: str = MC_SOLR_HOME_DIR) -> Dict[str, str]:
-    """Return dictionary with names and absolute paths to Solr collections."""
+    """Return dictionary with names and absolute paths to Solr collections.
+
+    Collections don't come and go while running, so the result is cached; don't modify the returned dictionary."""
     collections = {}
     collections_path = __collections_path(solr_home_dir)
-    collection_names = os.listdir(collections_path)
-    log.debug("Files in collections directory: %s" % collection_names)
-    for name in collection_names:
-        if not (name.startswith("_") or name.startswith(".")):
-            full_path = os.path.join(collections_path, name)
-            if os.path.isdir(full_path):
-
-                collection_conf_path = os.path.join(full_path, "conf")
+    with os.scandir(collections_path) as entries:
+        entries = list(entries)
+    log.debug("Files in collections directory: %s" % [entry.name for entry in entries])
+    for entry in entries:
+        if not entry.name.startswith(("_", ".")):
+            # Uses file type from readdir() instead of stat()ing every entry
+            if entry.is_dir():
+
+                collection_conf_path = os.path.join(entry.path, "conf")
                 if not os.path.isdir(collection_conf_path):
-                    raise McSolrRunException("Collection configuration path for collection '%s' does not exist." % name)
+                    raise McSolrRunException(
+                        "Collection configuration path for collection '%s' does not exist." % entry.name
+                    )
 
-                collections[name] = full_path
+                collections[entry.name] = entry.path
 
     return collections
 
 
+def __file_mode(path: str, follow_symlinks: bool = True) -> int:
+    """Return file's mode (st_mode) or 0 if it doesn't exist.
+
+    Does a single stat() to be used instead of separate os.path.exists() / isdir() / islink() probes."""
+    try:
+        return os.stat(path, follow_symlinks=follow_symlinks).st_mode
+    except OSError:
+        return 0
+
+
+def __copy_file(src: str, dst: str) -> str:
+    """Copy file with its metadata like shutil.copy2() does, but using sendfile() to not pass data through userspace.
+
+    To be used as copy_function for shutil.copytree()."""
+    with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+        src_size = os.fstat(src_file.fileno()).st_size
+        offset = 0
+        while offset < src_size:
+            try:
+                sent = os.sendfile(dst_file.fileno(), src_file.fileno(), offset, src_size - offset)
+            except OSError:
+                if offset > 0:
+                    raise
+                # Platform can't sendfile() to a regular file (e.g. macOS), copy the old way
+                shutil.copyfileobj(src_file, dst_file)
+                break
+            if sent == 0:
+                break
+            offset += sent
+
+    shutil.copystat(src, dst)
+    return dst
+
+
+def __write_file_if_changed(path: str, contents: str) -> bool:
+    """Write contents to file unless it has exactly those contents already; return True if file was written."""
+    contents = contents.encode('utf-8')
+    try:
+        if os.stat(path).st_size == len(contents):
+            with open(path, 'rb') as existing_file:
+                if existing_file.read() == contents:
+                    return False
+    except FileNotFoundError:
+        pass
+
+    with open(path, 'wb') as new_file:
+        new_file.write(contents)
+
+    return True
+
+
+def __instance_dir_entries(instance_data_dir: str) -> Dict[str, bool]:
+    """Return names of instance data directory's entries mapped to whether they're symlinks.
+
+    Lists the directory once so that per-item existence / symlink probes don't have to stat() every item."""
+    with os.scandir(instance_data_dir) as entries:
+        return {entry.name: entry.is_symlink() for entry in entries}
+
+
+def __symlink_instance_item(item_src_path: str,
+                            instance_data_dir: str,
+                            instance_entries: Dict[str, bool],
+                            item_description: str) -> None:
+    """Symlink item to instance data directory (with relative path), unless an identical symlink exists already.
+
+    Both item's source path and instance data directory are expected to be absolute."""
+    if not os.path.exists(item_src_path):
+        raise McSolrRunException("Expected %s '%s' does not exist" % (item_description.lower(), item_src_path))
+
+    item_name = os.path.basename(item_src_path)
+    item_dst_path = os.path.join(instance_data_dir, item_name)
+    rel_item_src_path = os.path.relpath(item_src_path, instance_data_dir)
+
+    if item_name in instance_entries:
+        if not instance_entries[item_name]:
+            raise McSolrRunException("%s '%s' exists but is not a symlink." % (item_description, item_dst_path))
+
+        if os.readlink(item_dst_path) == rel_item_src_path:
+            log.debug("Symlink '%s' already points to '%s'." % (item_dst_path, rel_item_src_path))
+            return
+
+        # Replace outdated symlink atomically
+        log.info("Updating symlink '%s' to point to '%s'..." % (item_dst_path, rel_item_src_path))
+        item_dst_temp_path = "%s.%d.tmp" % (item_dst_path, os.getpid())
+        os.symlink(rel_item_src_path, item_dst_temp_path)
+        os.replace(item_dst_temp_path, item_dst_path)
+
+    else:
+        log.info("Symlinking '%s' to '%s'..." % (item_src_path, item_dst_path))
+        os.symlink(rel_item_src_path, item_dst_path)
+        instance_entries[item_name] = True
+
+
 def __standalone_data_dir(base_data_dir: str = MC_SOLR_BASE_DATA_DIR) -> str:
     """Return data directory for a standalone instance."""
     if not os.path.isdir(base_data_dir):
@@ -205,7 +386,8 @@ def __raise_if_old_shards_exist() -> None:
     """Raise exception with migration instructions if old shard directories exist already."""
 
     pwd = resolve_absolute_path_under_mc_root(path=".")
-    old_shards = glob.glob(pwd + "/mediacloud-shard-*")
+    with os.scandir(pwd) as entries:
+        old_shards = sorted(entry.path for entry in entries if entry.name.startswith(__OLD_SHARD_DIR_PREFIX))
 
     if len(old_shards) == 0:
         # No old shards to migrate
@@ -215,35 +397,43 @@ def __raise_if_old_shards_exist() -> None:
     for old_shard_path in old_shards:
         old_shard_dir = os.path.basename(old_shard_path)
 
-        old_shard_num = re.search(r'^mediacloud-shard-(\d+?)$', old_shard_dir)
+        old_shard_num = __OLD_SHARD_DIR_REGEX.search(old_shard_dir)
         if old_shard_num is None:
             raise McSolrRunException("Unable to parse shard number for old shard directory '%s'" % old_shard_dir)
         old_shard_num = int(old_shard_num.group(1))
 
         num_shards = max(num_shards, old_shard_num)
 
-    exc_message = "Old shards were found at paths:\n\n"
+    exc_message_parts = ["Old shards were found at paths:\n\n"]
     for old_shard_path in old_shards:
-        exc_message += "* %s\n" % old_shard_path
-
-    exc_message += "\n"
-    exc_message += "Please migrate them by running:\n"
-    exc_message += "\n"
-    exc_message += "cd %s\n" % pwd
-    exc_message += "\n"
-    exc_message += "# Create empty new shard directory structure for each shard:\n"
+        exc_message_parts.append("* %s\n" % old_shard_path)
+
+    exc_message_parts.extend([
+        "\n",
+        "Please migrate them by running:\n",
+        "\n",
+        "cd %s\n" % pwd,
+        "\n",
+        "# Create empty new shard directory structure for each shard:\n",
+    ])
     for shard_num in range(1, num_shards + 1):
-        exc_message += ("./run_solr_shard.py --shard_num %(shard_num)d --shard_count %(shard_count)d "
-                        "|| echo \"It's fine to fail at this point.\"\n") % {
-                            "shard_num": shard_num,
-                            "shard_count": num_shards,
-        }
-
-    exc_message += "\n"
-    exc_message += "# Move data from old shards to new ones\n"
+        exc_message_parts.append(("./run_solr_shard.py --shard_num %(shard_num)d --shard_count %(shard_count)d "
+                                  "|| echo \"It's fine to fail at this point.\"\n") % {
+            "shard_num": shard_num,
+            "shard_count": num_shards,
+        })
+
+    exc_message_parts.extend([
+        "\n",
+        "# Move data from old shards to new ones\n",
+    ])
     for shard_num in range(1, num_shards + 1):
         shard_solr_path = "mediacloud-shard-%d/solr/" % shard_num
-        shard_collection_paths = glob.glob(shard_solr_path + "/collection*")
+        try:
+            with os.scandir(shard_solr_path) as entries:
+                shard_collection_paths = sorted(entry.path for entry in entries if entry.name.startswith("collection"))
+        except FileNotFoundError:
+            shard_collection_paths = []
         if len(shard_collection_paths) == 0:
             raise McSolrRunException("No collections found in shard '%d'" % shard_num)
         for collection_path in shard_collection_paths:
@@ -258,27 +448,43 @@ def __raise_if_old_shards_exist() -> None:
             if os.path.isdir(dst_collection_data_path):
                 raise McSolrRunException("Destination data directory '%s' already exists." % dst_collection_data_path)
 
-            exc_message += "mv %(src_collection_data_dir)s %(dst_collection_data_dir)s\n" % {
+            exc_message_parts.append("mv %(src_collection_data_dir)s %(dst_collection_data_dir)s\n" % {
                 "src_collection_data_dir": src_collection_data_path,
                 "dst_collection_data_dir": dst_collection_data_path,
-            }
-        exc_message += "\n"
+            })
+        exc_message_parts.append("\n")
 
-    exc_message += "# Remove old shards\n"
+    exc_message_parts.append("# Remove old shards\n")
     for shard_num in range(1, num_shards + 1):
-        exc_message += "rm -rf mediacloud-shard-%d/\n" % shard_num
+        exc_message_parts.append("rm -rf mediacloud-shard-%d/\n" % shard_num)
 
-    raise McSolrRunException(exc_message)
+    raise McSolrRunException("".join(exc_message_parts))
 
 
-def __run_solr_zkcli(zkcli_args: List[str],
-                     zookeeper_host: str = MC_SOLR_CLUSTER_ZOOKEEPER_HOST,
-                     zookeeper_port: int = MC_SOLR_CLUSTER_ZOOKEEPER_PORT,
-                     dist_directory: str = MC_DIST_DIR,
-                     solr_version: str = MC_SOLR_VERSION) -> None:
-    """Run Solr's zkcli.sh helper script."""
-    solr_path = __solr_path(dist_directory=dist_directory, solr_version=solr_version)
+def __run_concurrently(function: Callable, kwargs_list: List[Dict[str, Any]], max_workers: int) -> None:
+    """Call function once with every set of keyword arguments using a thread pool; re-raise the first exception."""
+    if len(kwargs_list) == 0:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(kwargs_list))) as executor:
+        futures = [executor.submit(function, **kwargs) for kwargs in kwargs_list]
+        for future in futures:
+            future.result()
+
+
+@lru_cache(maxsize=None)
+def __jar_files(directory: str) -> List[str]:
+    """Return sorted paths to JAR files in directory, i.e. what "directory/*" on Java's classpath expands to."""
+    if not os.path.isdir(directory):
+        raise McSolrRunException("JAR directory '%s' does not exist." % directory)
+    with os.scandir(directory) as entries:
+        return sorted(entry.path for entry in entries if entry.name.endswith((".jar", ".JAR")) and entry.is_file())
+
 
+def __solr_zkcli_java_args(dist_directory: str = MC_DIST_DIR, solr_version: str = MC_SOLR_VERSION) -> List[str]:
+    """Return Java command to run Solr's ZkCLI with (same as zkcli.sh helper script does), without ZkCLI's arguments.
+
+    Resolve once and reuse for every ZkCLI command run."""
     jetty_home_path = __jetty_home_path(dist_directory=dist_directory, solr_version=solr_version)
     log4j_properties_path = os.path.join(jetty_home_path, "scripts", "cloud-scripts", "log4j.properties")
 
@@ -288,28 +494,73 @@ def __run_solr_zkcli(zkcli_args: List[str],
             log4j_properties_path
         )
 
-    if not tcp_port_is_open(hostname=zookeeper_host, port=zookeeper_port):
-        raise McSolrRunException("ZooKeeper is not running at %s:%d." % (zookeeper_host, zookeeper_port))
+    # Same classpath as zkcli.sh uses; JARs in dist/ are either duplicates of webapp's ones (solr-core, solrj) or
+    # contrib modules that ZkCLI doesn't need, and would only make the JVM scan more JARs when loading classes
+    java_classpath_dirs = [
+        os.path.join(jetty_home_path, "solr-webapp", "webapp", "WEB-INF", "lib"),
+        os.path.join(jetty_home_path, "lib", "ext"),
+    ]
 
-    jetty_home_path = __jetty_home_path(dist_directory=dist_directory, solr_version=solr_version)
+    # Pass a list of JARs instead of "directory/*" wildcards for every JVM to not have to expand them itself
+    java_classpath = []
+    for java_classpath_dir in java_classpath_dirs:
+        java_classpath += __jar_files(java_classpath_dir)
 
-    zkhost = "%s:%d" % (zookeeper_host, zookeeper_port)
+    return ["java",
 
-    java_classpath_dirs = [
-        os.path.join(solr_path, "dist", "*"),
-        os.path.join(jetty_home_path, "solr-webapp", "webapp", "WEB-INF", "lib", "*"),
-        os.path.join(jetty_home_path, "lib", "ext", "*"),
-    ]
+            # ZkCLI exits in a few seconds so JVM startup dominates its run time; don't bother with optimizing
+            # compiler's tier and parallel GC threads
+            "-XX:TieredStopAtLevel=1",
+            "-XX:+UseSerialGC",
 
-    args = ["java",
-            "-classpath", ":".join(java_classpath_dirs),
+            "-classpath", ":".join(java_classpath),
             "-Dlog4j.configuration=file://" + os.path.abspath(log4j_properties_path),
-            "org.apache.solr.cloud.ZkCLI",
-            "-zkhost", zkhost] + zkcli_args
+            "org.apache.solr.cloud.ZkCLI"]
+
+
+def __run_solr_zkcli(zkcli_java_args: List[str],
+                     zkcli_args: List[str],
+                     zookeeper_host: str = MC_SOLR_CLUSTER_ZOOKEEPER_HOST,
+                     zookeeper_port: int = MC_SOLR_CLUSTER_ZOOKEEPER_PORT) -> None:
+    """Run Solr's ZkCLI with Java command returned by __solr_zkcli_java_args()."""
+    zkhost = "%s:%d" % (zookeeper_host, zookeeper_port)
+
+    args = zkcli_java_args + ["-zkhost", zkhost] + zkcli_args
 
     run_command_in_foreground(args)
 
 
+def __upload_zookeeper_collection_configuration(collection_name: str,
+                                                collection_path: str,
+                                                zkcli_java_args: List[str],
+                                                zookeeper_host: str,
+                                                zookeeper_port: int) -> None:
+    """Upload and link a single collection's configuration on ZooKeeper."""
+    collection_conf_path = os.path.join(collection_path, "conf")
+
+    # Copy configuration because ZooKeeper's uploader doesn't like symlinks
+    log.info("Copying collection's '%s' configuration to a temporary directory..." % collection_name)
+    collection_conf_temp_dir = os.path.join(tempfile.mkdtemp(), collection_name)
+    shutil.copytree(collection_conf_path, collection_conf_temp_dir, copy_function=__copy_file)
+
+    log.info("Uploading collection's '%s' configuration at '%s'..." % (
+        collection_name, collection_conf_temp_dir))
+    __run_solr_zkcli(zkcli_java_args=zkcli_java_args,
+                     zkcli_args=["-cmd", "upconfig",
+                                 "-confdir", collection_conf_temp_dir,
+                                 "-confname", collection_name],
+                     zookeeper_host=zookeeper_host,
+                     zookeeper_port=zookeeper_port)
+
+    log.info("Linking collection's '%s' configuration..." % collection_name)
+    __run_solr_zkcli(zkcli_java_args=zkcli_java_args,
+                     zkcli_args=["-cmd", "linkconfig",
+                                 "-collection", collection_name,
+                                 "-confname", collection_name],
+                     zookeeper_host=zookeeper_host,
+                     zookeeper_port=zookeeper_port)
+
+
 def update_zookeeper_solr_configuration(zookeeper_host: str = MC_SOLR_CLUSTER_ZOOKEEPER_HOST,
                                         zookeeper_port: int = MC_SOLR_CLUSTER_ZOOKEEPER_PORT,
                                         dist_directory: str = MC_DIST_DIR,
@@ -325,37 +576,77 @@ def update_zookeeper_solr_configuration(zookeeper_host: str = MC_SOLR_CLUSTER_ZO
     collections = __collections()
     log.debug("Solr collections: %s" % collections)
 
+    zkcli_java_args = __solr_zkcli_java_args(dist_directory=dist_directory, solr_version=solr_version)
+
+    # Collections' configurations are independent from each other, so upload them concurrently to not have to wait
+    # for every ZkCLI's JVM to start up one after another
     log.info("Uploading Solr collection configurations to ZooKeeper...")
+    upload_kwargs = []
     for collection_name, collection_path in sorted(collections.items()):
-        collection_conf_path = os.path.join(collection_path, "conf")
-
-        # Copy configuration because ZooKeeper's uploader doesn't like symlinks
-        log.info("Copying collection's '%s' configuration to a temporary directory..." % collection_name)
-        collection_conf_temp_dir = os.path.join(tempfile.mkdtemp(), collection_name)
-        shutil.copytree(collection_conf_path, collection_conf_temp_dir)
-
-        log.info("Uploading collection's '%s' configuration at '%s'..." % (
-            collection_name, collection_conf_temp_dir))
-        __run_solr_zkcli(zkcli_args=["-cmd", "upconfig",
-                                     "-confdir", collection_conf_temp_dir,
-                                     "-confname", collection_name],
-                         zookeeper_host=zookeeper_host,
-                         zookeeper_port=zookeeper_port,
-                         dist_directory=dist_directory,
-                         solr_version=solr_version)
-
-        log.info("Linking collection's '%s' configuration..." % collection_name)
-        __run_solr_zkcli(zkcli_args=["-cmd", "linkconfig",
-                                     "-collection", collection_name,
-                                     "-confname", collection_name],
-                         zookeeper_host=zookeeper_host,
-                         zookeeper_port=zookeeper_port,
-                         dist_directory=dist_directory,
-                         solr_version=solr_version)
+        upload_kwargs.append({
+            "collection_name": collection_name,
+            "collection_path": collection_path,
+            "zkcli_java_args": zkcli_java_args,
+            "zookeeper_host": zookeeper_host,
+            "zookeeper_port": zookeeper_port,
+        })
+    __run_concurrently(function=__upload_zookeeper_collection_configuration,
+                       kwargs_list=upload_kwargs,
+                       max_workers=MC_SOLR_CLUSTER_ZOOKEEPER_UPLOAD_MAX_WORKERS)
 
     log.info("Uploaded Solr collection configurations to ZooKeeper.")
 
 
+def __prepare_collection(collection_name: str,
+                         collection_path: str,
+                         instance_data_dir: str,
+                         instance_entries: Dict[str, bool]) -> None:
+    """Create collection's directory in instance data directory, copy its configuration and write core.properties."""
+    log.info("Updating collection '%s'..." % collection_name)
+
+    collection_conf_src_dir = os.path.join(collection_path, "conf")
+    if not os.path.isdir(collection_conf_src_dir):
+        raise McSolrRunException("Configuration for collection '%s' at %s does not exist" % (
+            collection_name, collection_conf_src_dir
+        ))
+
+    collection_dst_dir = os.path.join(instance_data_dir, collection_name)
+    if collection_name not in instance_entries:
+        mkdir_p(collection_dst_dir)
+
+    # Remove and copy configuration in case it has changed
+    # (don't symlink because Solr 5.5+ doesn't like those)
+    collection_conf_dst_dir = os.path.join(collection_dst_dir, "conf")
+    collection_conf_dst_mode = __file_mode(collection_conf_dst_dir, follow_symlinks=False)
+    if collection_conf_dst_mode:
+        log.debug("Removing old collection configuration in '%s'..." % collection_conf_dst_dir)
+        if stat.S_ISLNK(collection_conf_dst_mode):
+            # Might still be a link from older Solr versions
+            os.unlink(collection_conf_dst_dir)
+        else:
+            shutil.rmtree(collection_conf_dst_dir)
+
+    log.info("Copying '%s' to '%s'..." % (collection_conf_src_dir, collection_conf_dst_dir))
+    shutil.copytree(collection_conf_src_dir, collection_conf_dst_dir, symlinks=False, copy_function=__copy_file)
+
+    core_properties_path = os.path.join(collection_dst_dir, "core.properties")
+    core_properties = """
+#
+# This file is autogenerated. Don't bother editing it!
+#
+
+name=%(collection_name)s
+instanceDir=%(instance_dir)s
+""" % {
+        "collection_name": collection_name,
+        "instance_dir": collection_dst_dir,
+    }
+    if __write_file_if_changed(path=core_properties_path, contents=core_properties):
+        log.info("Updated core.properties for collection '%s'." % collection_name)
+    else:
+        log.debug("core.properties for collection '%s' is up to date." % collection_name)
+
+
 # noinspection PyUnusedLocal
 def __kill_solr_process(signum: int = None, frame: int = None) -> None:
     """Pass SIGINT/SIGTERM to child Solr when exiting."""
@@ -395,54 +686,35 @@ def __run_solr(port: int,
 
     solr_path = __solr_path(dist_directory=dist_directory, solr_version=solr_version)
 
+    # Resolve once here as the path gets used for every collection and symlink and in JVM arguments; paths to Solr
+    # home and Solr distribution are absolute already
+    instance_data_dir = os.path.abspath(instance_data_dir)
+
     if not os.path.isdir(instance_data_dir):
         log.info("Creating data directory at %s..." % instance_data_dir)
         mkdir_p(instance_data_dir)
 
+    instance_entries = __instance_dir_entries(instance_data_dir)
+
     log.info("Updating collections at %s..." % instance_data_dir)
     collections = __collections(solr_home_dir=solr_home_dir)
-    for collection_name, collection_path in sorted(collections.items()):
-        log.info("Updating collection '%s'..." % collection_name)
-
-        collection_conf_src_dir = os.path.join(collection_path, "conf")
-        if not os.path.isdir(collection_conf_src_dir):
-            raise McSolrRunException("Configuration for collection '%s' at %s does not exist" % (
-                collection_name, collection_conf_src_dir
-            ))
 
-        collection_dst_dir = os.path.join(instance_data_dir, collection_name)
-        mkdir_p(collection_dst_dir)
-
-        # Remove and copy configuration in case it has changed
-        # (don't symlink because Solr 5.5+ doesn't like those)
-        collection_conf_dst_dir = os.path.join(collection_dst_dir, "conf")
-        if os.path.lexists(collection_conf_dst_dir):
-            log.debug("Removing old collection configuration in '%s'..." % collection_conf_dst_dir)
-            if os.path.islink(collection_conf_dst_dir):
-                # Might still be a link from older Solr versions
-                os.unlink(collection_conf_dst_dir)
-            else:
-                shutil.rmtree(collection_conf_dst_dir)
-
-        log.info("Copying '%s' to '%s'..." % (collection_conf_src_dir, collection_conf_dst_dir))
-        shutil.copytree(collection_conf_src_dir, collection_conf_dst_dir, symlinks=False)
-
-        log.info("Updating core.properties for collection '%s'..." % collection_name)
-        core_properties_path = os.path.join(collection_dst_dir, "core.properties")
-        with open(core_properties_path, 'w') as core_properties_file:
-            core_properties_file.write("""
-#
-# This file is autogenerated. Don't bother editing it!
-#
+    # Collections don't depend on each other, so set them up concurrently to not have to wait for every file operation
+    # one after another if data directory is on a network filesystem
+    prepare_kwargs = []
+    for collection_name, collection_path in sorted(collections.items()):
+        prepare_kwargs.append({
+            "collection_name": collection_name,
+            "collection_path": collection_path,
+            "instance_data_dir": instance_data_dir,
+            "instance_entries": instance_entries,
+        })
+    __run_concurrently(function=__prepare_collection,
+                       kwargs_list=prepare_kwargs,
+                       max_workers=MC_SOLR_INSTANCE_SETUP_MAX_WORKERS)
 
-name=%(collection_name)s
-instanceDir=%(instance_dir)s
-""" % {
-                "collection_name": collection_name,
-                "instance_dir": collection_dst_dir,
-            })
+    jetty_home_path = __jetty_home_path(dist_directory=dist_directory, solr_version=solr_version)
 
-    log.info("Symlinking shard configuration...")
     config_items_to_symlink = [
         "contexts",
         "etc",
@@ -450,45 +722,34 @@ instanceDir=%(instance_dir)s
         "resources",
         "solr.xml",
     ]
-    for config_item in config_items_to_symlink:
-        config_item_src_path = os.path.join(solr_home_dir, config_item)
-        if not os.path.exists(config_item_src_path):
-            raise McSolrRunException("Expected configuration item '%s' does not exist" % config_item_src_path)
-
-        # Recreate symlink just in case
-        config_item_dst_path = os.path.join(instance_data_dir, config_item)
-        if os.path.lexists(config_item_dst_path):
-            if not os.path.islink(config_item_dst_path):
-                raise McSolrRunException("Configuration item '%s' exists but is not a symlink." % config_item_dst_path)
-            os.unlink(config_item_dst_path)
-
-        log.info("Symlinking '%s' to '%s'..." % (config_item_src_path, config_item_dst_path))
-        relative_symlink(config_item_src_path, config_item_dst_path)
-
-    jetty_home_path = __jetty_home_path(dist_directory=dist_directory, solr_version=solr_version)
-
-    log.info("Symlinking libraries and JARs...")
     library_items_to_symlink = [
         "lib",
         "solr-webapp",
         "start.jar",
         "solr",
-        "solr-webapp",
     ]
-    for library_item in library_items_to_symlink:
-        library_item_src_path = os.path.join(jetty_home_path, library_item)
-        if not os.path.exists(library_item_src_path):
-            raise McSolrRunException("Expected library item '%s' does not exist" % library_item_src_path)
 
-        # Recreate symlink just in case
-        library_item_dst_path = os.path.join(instance_data_dir, library_item)
-        if os.path.lexists(library_item_dst_path):
-            if not os.path.islink(library_item_dst_path):
-                raise McSolrRunException("Library item '%s' exists but is not a symlink." % library_item_dst_path)
-            os.unlink(library_item_dst_path)
-
-        log.info("Symlinking '%s' to '%s'..." % (library_item_src_path, library_item_dst_path))
-        relative_symlink(library_item_src_path, library_item_dst_path)
+    # Every item gets symlinked under a different name so symlinks can be created concurrently too
+    symlink_kwargs = []
+    for config_item in config_items_to_symlink:
+        symlink_kwargs.append({
+            "item_src_path": os.path.join(solr_home_dir, config_item),
+            "instance_data_dir": instance_data_dir,
+            "instance_entries": instance_entries,
+            "item_description": "Configuration item",
+        })
+    for library_item in library_items_to_symlink:
+        symlink_kwargs.append({
+            "item_src_path": os.path.join(jetty_home_path, library_item),
+            "instance_data_dir": instance_data_dir,
+            "instance_entries": instance_entries,
+            "item_description": "Library item",
+        })
+
+    log.info("Symlinking shard configuration, libraries and JARs...")
+    __run_concurrently(function=__symlink_instance_item,
+                       kwargs_list=symlink_kwargs,
+                       max_workers=MC_SOLR_INSTANCE_SETUP_MAX_WORKERS)
 
     log4j_properties_path = os.path.join(solr_home_dir, "resources", "log4j.properties")
     if not os.path.isfile(log4j_properties_path):
@@ -498,7 +759,7 @@ instanceDir=%(instance_dir)s
     if not os.path.isfile(start_jar_path):
         raise McSolrRunException("start.jar at '%s' was not found." % start_jar_path)
 
-    solr_webapp_path = os.path.abspath(os.path.join(jetty_home_path, "solr-webapp"))
+    solr_webapp_path = os.path.join(jetty_home_path, "solr-webapp")
     if not os.path.isdir(solr_webapp_path):
         raise McSolrRunException("Solr webapp dir at '%s' was not found." % solr_webapp_path)
 
@@ -519,7 +780,7 @@ instanceDir=%(instance_dir)s
     # noinspection SpellCheckingInspection
     args += [
         "-server",
-        "-Djava.util.logging.config.file=file://" + os.path.abspath(log4j_properties_path),
+        "-Djava.util.logging.config.file=file://" + log4j_properties_path,
         "-Djetty.base=%s" % instance_data_dir,
         "-Djetty.home=%s" % instance_data_dir,
         "-Djetty.port=%d" % port,
@@ -565,8 +826,12 @@ instanceDir=%(instance_dir)s
     wait_for_tcp_port_to_open(port=port, retries=connect_timeout)
 
     log.info("Solr is running on port %d!" % port)
-    while True:
-        time.sleep(1)
+
+    # Block until Solr exits instead of waking up periodically; with SIGCHLD ignored, waitpid() returns only after
+    # the child is gone (and its exit code is not available)
+    process.wait()
+
+    raise McSolrRunException("Solr with PID %d running on port %d has exited." % (__solr_pid, port))
 
 
 def run_solr_standalone(hostname: str = None,
@@ -650,40 +915,83 @@ def run_solr_shard(shard_num: int,
                solr_version=solr_version)
 
 
-def reload_solr_shard(shard_num: int,
-                      host: str = "localhost",
-                      starting_port: int = MC_SOLR_CLUSTER_STARTING_PORT):
-    """Reload Solr shard after ZooKeeper configuration change."""
-    if shard_num < 1:
-        raise McSolrRunException("Shard number must be 1 or greater.")
+def __solr_admin_session(host_port_count: int = 1) -> requests.Session:
+    """Return HTTP session for making concurrent admin requests to Solr running on host_port_count host:port pairs.
+
+    One connection pool gets kept for every host:port pair (e.g. every shard), each as big as the thread pool that
+    makes the requests, so that connections get reused instead of being set up for every request."""
+    adapter = HTTPAdapter(pool_connections=max(host_port_count, 1),
+                          pool_maxsize=MC_SOLR_ADMIN_REQUEST_MAX_WORKERS)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    return session
+
+
+def __reload_solr_collection(session: requests.Session,
+                             collection_name: str,
+                             shard_num: int,
+                             host: str,
+                             shard_port: int) -> None:
+    """Reload a single collection on Solr shard."""
+    log.info("Reloading collection '%s' on shard %d on %s:%d..." % (
+        collection_name, shard_num, host, shard_port
+    ))
+    url = "http://%(host)s:%(port)d/solr/admin/cores?action=RELOAD&core=%(collection_name)s" % {
+        "host": host,
+        "port": shard_port,
+        "collection_name": collection_name,
+    }
+    log.debug("Requesting URL %s..." % url)
 
-    shard_port = __shard_port(shard_num=shard_num, starting_port=starting_port)
+    try:
+        session.get(url).raise_for_status()
+    except requests.RequestException as ex:
+        raise McSolrRunException("Unable to reload shard %d on %s:%d: %s" % (shard_num, host, shard_port, str(ex)))
+
+
+def __reload_solr_shards(shard_nums: Iterable[int], host: str, starting_port: int) -> None:
+    """Reload collections on all of the listed Solr shards concurrently."""
+    shard_ports = {}
+    for shard_num in shard_nums:
+        if shard_num < 1:
+            raise McSolrRunException("Shard number must be 1 or greater.")
 
-    if not tcp_port_is_open(hostname=host, port=shard_port):
-        raise McSolrRunException("Shard %d is not running on %s:%d." % (shard_num, host, shard_port))
+        shard_port = __shard_port(shard_num=shard_num, starting_port=starting_port)
 
-    log.info("Reloading shard %d on %s:%d..." % (shard_num, host, shard_port))
+        if not tcp_port_is_open(hostname=host, port=shard_port):
+            raise McSolrRunException("Shard %d is not running on %s:%d." % (shard_num, host, shard_port))
+
+        shard_ports[shard_num] = shard_port
 
     collections = __collections()
     log.debug("Solr collections: %s" % collections)
 
-    for collection_name, collection_path in sorted(collections.items()):
-        log.info("Reloading collection '%s' on shard %d on %s:%d..." % (
-            collection_name, shard_num, host, shard_port
-        ))
-        url = "http://%(host)s:%(port)d/solr/admin/cores?action=RELOAD&core=%(collection_name)s" % {
-            "host": host,
-            "port": shard_port,
-            "collection_name": collection_name,
-        }
-        log.debug("Requesting URL %s..." % url)
+    with __solr_admin_session(host_port_count=len(shard_ports)) as session:
+        reload_kwargs = []
+        for shard_num, shard_port in sorted(shard_ports.items()):
+            log.info("Reloading shard %d on %s:%d..." % (shard_num, host, shard_port))
+            for collection_name in sorted(collections.keys()):
+                reload_kwargs.append({
+                    "session": session,
+                    "collection_name": collection_name,
+                    "shard_num": shard_num,
+                    "host": host,
+                    "shard_port": shard_port,
+                })
 
-        try:
-            urlopen(url)
-        except URLError as e:
-            raise McSolrRunException("Unable to reload shard %d on %s:%d: %s" % (shard_num, host, shard_port, e.reason))
+        __run_concurrently(function=__reload_solr_collection,
+                           kwargs_list=reload_kwargs,
+                           max_workers=MC_SOLR_ADMIN_REQUEST_MAX_WORKERS)
 
-    log.info("Reloaded shard %d on %s:%d." % (shard_num, host, shard_port))
+    for shard_num, shard_port in sorted(shard_ports.items()):
+        log.info("Reloaded shard %d on %s:%d." % (shard_num, host, shard_port))
+
+
+def reload_solr_shard(shard_num: int,
+                      host: str = "localhost",
+                      starting_port: int = MC_SOLR_CLUSTER_STARTING_PORT):
+    """Reload Solr shard after ZooKeeper configuration change."""
+    __reload_solr_shards(shard_nums=[shard_num], host=host, starting_port=starting_port)
 
 
 def reload_all_solr_shards(shard_count: int,
@@ -694,11 +1002,29 @@ def reload_all_solr_shards(shard_count: int,
         raise McSolrRunException("Shard count must be 1 or greater.")
 
     log.info("Reloading %d shards on %s..." % (shard_count, host))
-    for shard_num in range(1, shard_count + 1):
-        reload_solr_shard(shard_num=shard_num, host=host, starting_port=starting_port)
+    __reload_solr_shards(shard_nums=range(1, shard_count + 1), host=host, starting_port=starting_port)
     log.info("Reloaded %d shards on %s." % (shard_count, host))
 
 
+def __optimize_solr_collection(session: requests.Session, collection_name: str, host: str, port: int) -> None:
+    """Optimize a single collection's index."""
+    log.info("Optimizing collection's '%s' index on %s:%d..." % (
+        collection_name, host, port))
+
+    url = "http://%(host)s:%(port)d/solr/%(collection_name)s/update?optimize=true" % {
+        "host": host,
+        "port": port,
+        "collection_name": collection_name,
+    }
+    log.debug("Requesting URL %s..." % url)
+
+    try:
+        session.get(url).raise_for_status()
+    except requests.RequestException as ex:
+        raise McSolrRunException("Unable to optimize collection '%s' index on %s:%d: %s" % (
+            collection_name, host, port, str(ex)))
+
+
 def optimize_solr_index(host: str = "localhost",
                         port: int = MC_SOLR_STANDALONE_PORT,
                         collections: List[str] = None):
@@ -716,22 +1042,12 @@ def optimize_solr_index(host: str = "localhost",
 
     log.info("Optimizing indexes on %s:%d..." % (host, port))
 
-    for collection_name in sorted(collections):
-        log.info("Optimizing collection's '%s' index on %s:%d..." % (
-            collection_name, host, port))
-
-        url = "http://%(host)s:%(port)d/solr/%(collection_name)s/update?optimize=true" % {
-            "host": host,
-            "port": port,
-            "collection_name": collection_name,
-        }
-        log.debug("Requesting URL %s..." % url)
-
-        try:
-            urlopen(url)
-        except URLError as e:
-            raise McSolrRunException("Unable to optimize collection '%s' index on %s:%d: %s" % (
-                collection_name, host, port, e.reason))
+    with __solr_admin_session() as session:
+        optimize_kwargs = [{"session": session, "collection_name": collection_name, "host": host, "port": port}
+                           for collection_name in sorted(collections)]
+        __run_concurrently(function=__optimize_solr_collection,
+                           kwargs_list=optimize_kwargs,
+                           max_workers=MC_SOLR_ADMIN_REQUEST_MAX_WORKERS)
 
     log.info("Optimized indexes on %s:%d." % (host, port))
 
@@ -1,7 +1,9 @@
 import bz2
 import gzip as gzip_lib
 import os
-from typing import Union
+import posixpath
+import tarfile
+from typing import BinaryIO, Iterator, Union
 
 from mediawords.util.log import create_logger
 from mediawords.util.paths import file_extension
@@ -10,6 +12,12 @@ from mediawords.util.process import run_command_in_foreground, McRunCommandInFor
 
 log = create_logger(__name__)
 
+# Chunk size to read compressed Tar archive streams with (tarfile's default is 10 KB)
+__TARBALL_STREAM_READ_SIZE = 128 * 1024
+
+# Buffer size to copy extracted files with (tarfile's default is 16 KB)
+__TARBALL_STREAM_COPY_BUFFER_SIZE = 1024 * 1024
+
 
 class McCompressException(Exception):
     """Exception raised when compressing or decompressing data."""
@@ -21,6 +29,11 @@ class McExtractTarballToDirectoryException(McCompressException):
     pass
 
 
+class McExtractTarballStreamToDirectoryException(McCompressException):
+    """extract_tarball_stream_to_directory() exception."""
+    pass
+
+
 class McExtractZipToDirectoryException(McCompressException):
     """extract_zip_to_directory() exception."""
     pass
@@ -77,6 +90,88 @@ def extract_tarball_to_directory(archive_file: str, dest_directory: str, strip_r
         raise McExtractTarballToDirectoryException("Error while extracting archive '%s': %s" % (archive_file, str(ex)))
 
 
+def __tarball_stream_members(tar: tarfile.TarFile,
+                             dest_directory: str,
+                             strip_root: bool) -> Iterator[tarfile.TarInfo]:
+    """Yield members of a streamed Tar archive, optionally with the root directory stripped from their paths.
+
+    Members get extracted one by one while being iterated over, so every member's path gets resolved against what's
+    been extracted to destination directory so far."""
+
+    real_dest_directory = os.path.realpath(dest_directory)
+
+    def __member_path(path: str) -> str:
+        if os.path.isabs(path):
+            raise McExtractTarballStreamToDirectoryException("Archive member '%s' has an absolute path" % path)
+        path_parts = [part for part in path.split('/') if part not in ('', '.')]
+        if '..' in path_parts:
+            raise McExtractTarballStreamToDirectoryException("Archive member '%s' points outside archive" % path)
+        if strip_root:
+            path_parts = path_parts[1:]
+        return '/'.join(path_parts)
+
+    def __raise_if_resolves_outside(path: str, member_name: str) -> None:
+        # Follow symlinks extracted earlier (including chains of them) which lexical checks can't see through
+        real_path = os.path.realpath(os.path.join(dest_directory, path))
+        if real_path != real_dest_directory and not real_path.startswith(real_dest_directory + os.sep):
+            raise McExtractTarballStreamToDirectoryException(
+                "Archive member '%s' resolves to '%s' which is outside destination directory" % (
+                    member_name, real_path,
+                ))
+
+    for member in tar:
+        member.name = __member_path(member.name)
+        if member.name == '':
+            # Stripped root directory itself
+            continue
+
+        if member.issym():
+            # Symlink targets are relative to symlink's own directory; don't let later members get written through
+            # a symlink pointing outside destination directory
+            link_target = posixpath.normpath(posixpath.join(posixpath.dirname(member.name), member.linkname))
+            if posixpath.isabs(member.linkname) or link_target == '..' or link_target.startswith('../'):
+                raise McExtractTarballStreamToDirectoryException(
+                    "Archive member '%s' is a symlink to '%s' which points outside archive" % (
+                        member.name, member.linkname,
+                    ))
+
+            # Symlink itself replaces whatever is at its path, so only its parent directory has to stay inside
+            __raise_if_resolves_outside(path=posixpath.dirname(member.name), member_name=member.name)
+
+        else:
+            # Files and directories get written through whatever symlink might be at their path
+            __raise_if_resolves_outside(path=member.name, member_name=member.name)
+
+            if member.islnk():
+                # Hard link targets are paths within the archive too
+                member.linkname = __member_path(member.linkname)
+                __raise_if_resolves_outside(path=member.linkname, member_name=member.name)
+
+        yield member
+
+
+def extract_tarball_stream_to_directory(stream: BinaryIO, dest_directory: str, strip_root: bool = False) -> None:
+    """Extract gzipped Tar archive read from a stream (e.g. HTTP response) to destination directory, optionally
+    stripping the root directory first.
+
+    Stream doesn't have to be seekable so the archive gets extracted while it's still being read."""
+
+    dest_directory = decode_object_from_bytes_if_needed(dest_directory)
+
+    if not os.path.isdir(dest_directory):
+        raise McExtractTarballStreamToDirectoryException("Destination directory '%s' does not exist" % dest_directory)
+
+    try:
+        with tarfile.open(fileobj=stream,
+                          mode='r|gz',
+                          bufsize=__TARBALL_STREAM_READ_SIZE,
+                          copybufsize=__TARBALL_STREAM_COPY_BUFFER_SIZE) as tar:
+            members = __tarball_stream_members(tar=tar, dest_directory=dest_directory, strip_root=strip_root)
+            tar.extractall(path=dest_directory, members=members)
+    except (tarfile.TarError, EOFError, OSError) as ex:
+        raise McExtractTarballStreamToDirectoryException("Error while extracting archive stream: %s" % str(ex))
+
+
 def extract_zip_to_directory(archive_file: str, dest_directory: str) -> None:
     """Extract ZIP archive (.zip or .war) to destination directory."""
 
@@ -1,3 +1,4 @@
+import io
 import os
 import tarfile
 import tempfile
@@ -7,9 +8,11 @@ import pytest
 
 from mediawords.util.compress import (
     extract_tarball_to_directory,
+    extract_tarball_stream_to_directory,
     extract_zip_to_directory,
     run_command_in_foreground,
     McExtractTarballToDirectoryException,
+    McExtractTarballStreamToDirectoryException,
     McExtractZipToDirectoryException,
     gzip,
     gunzip,
@@ -62,6 +65,87 @@ def test_extract_tarball_to_directory():
     assert os.path.isfile(os.path.join(dst_strip_root_temp_dir, 'test.txt'))
 
 
+def test_extract_tarball_stream_to_directory():
+    src_temp_dir = tempfile.mkdtemp()
+    dst_temp_dir = tempfile.mkdtemp()
+
+    # Nonexistent destination directory
+    with pytest.raises(McExtractTarballStreamToDirectoryException):
+        extract_tarball_stream_to_directory(io.BytesIO(b''), os.path.join(dst_temp_dir, 'nonexistent'))
+
+    # Faulty archive
+    with pytest.raises(McExtractTarballStreamToDirectoryException):
+        extract_tarball_stream_to_directory(io.BytesIO(b'Totally not valid Gzip data.'), dst_temp_dir)
+
+    # .tar.gz archive
+    tar_archive_path = os.path.join(src_temp_dir, 'tar-gz-archive.tar.gz')
+    tar_archive_contents_dir = os.path.join(src_temp_dir, 'test-contents')
+    os.mkdir(tar_archive_contents_dir)
+    with open(os.path.join(tar_archive_contents_dir, 'test.txt'), 'w') as fh:
+        fh.write('Test contents')
+    with tarfile.open(tar_archive_path, "w:gz") as tar:
+        tar.add(tar_archive_contents_dir, arcname=os.path.basename(tar_archive_contents_dir))
+
+    with open(tar_archive_path, 'rb') as stream:
+        extract_tarball_stream_to_directory(stream=stream, dest_directory=dst_temp_dir)
+
+    assert os.path.isdir(os.path.join(dst_temp_dir, 'test-contents'))
+    assert os.path.isfile(os.path.join(dst_temp_dir, 'test-contents', 'test.txt'))
+
+    # Strip root
+    dst_strip_root_temp_dir = tempfile.mkdtemp()
+    with open(tar_archive_path, 'rb') as stream:
+        extract_tarball_stream_to_directory(stream=stream, dest_directory=dst_strip_root_temp_dir, strip_root=True)
+    assert os.path.isdir(os.path.join(dst_strip_root_temp_dir, 'test-contents')) is False
+    assert os.path.isfile(os.path.join(dst_strip_root_temp_dir, 'test.txt'))
+    with open(os.path.join(dst_strip_root_temp_dir, 'test.txt'), 'r') as fh:
+        assert fh.read() == 'Test contents'
+
+    # Member pointing outside of destination directory
+    unsafe_archive = io.BytesIO()
+    with tarfile.open(fileobj=unsafe_archive, mode="w:gz") as tar:
+        tar.add(os.path.join(tar_archive_contents_dir, 'test.txt'), arcname='../test.txt')
+    unsafe_archive.seek(0)
+    with pytest.raises(McExtractTarballStreamToDirectoryException):
+        extract_tarball_stream_to_directory(stream=unsafe_archive, dest_directory=tempfile.mkdtemp())
+
+    # Symlink pointing outside of destination directory followed by a member written through it
+    outside_temp_dir = tempfile.mkdtemp()
+    for symlink_target in [outside_temp_dir, '../../' + os.path.basename(outside_temp_dir)]:
+        unsafe_symlink_archive = io.BytesIO()
+        with tarfile.open(fileobj=unsafe_symlink_archive, mode="w:gz") as tar:
+            symlink_info = tarfile.TarInfo(name='root/escape')
+            symlink_info.type = tarfile.SYMTYPE
+            symlink_info.linkname = symlink_target
+            tar.addfile(symlink_info)
+            tar.add(os.path.join(tar_archive_contents_dir, 'test.txt'), arcname='root/escape/evil.txt')
+        unsafe_symlink_archive.seek(0)
+        with pytest.raises(McExtractTarballStreamToDirectoryException):
+            extract_tarball_stream_to_directory(stream=unsafe_symlink_archive,
+                                                dest_directory=tempfile.mkdtemp(),
+                                                strip_root=True)
+        assert os.path.exists(os.path.join(outside_temp_dir, 'evil.txt')) is False
+
+    # Chain of symlinks that only points outside of destination directory once resolved on disk
+    chained_dst_parent_dir = tempfile.mkdtemp()
+    chained_dst_dir = os.path.join(chained_dst_parent_dir, 'dst')
+    os.mkdir(chained_dst_dir)
+    chained_symlink_archive = io.BytesIO()
+    with tarfile.open(fileobj=chained_symlink_archive, mode="w:gz") as tar:
+        for symlink_name, symlink_target in [('root/q', '.'), ('root/p', 'q/..')]:
+            symlink_info = tarfile.TarInfo(name=symlink_name)
+            symlink_info.type = tarfile.SYMTYPE
+            symlink_info.linkname = symlink_target
+            tar.addfile(symlink_info)
+        tar.add(os.path.join(tar_archive_contents_dir, 'test.txt'), arcname='root/p/evil.txt')
+    chained_symlink_archive.seek(0)
+    with pytest.raises(McExtractTarballStreamToDirectoryException):
+        extract_tarball_stream_to_directory(stream=chained_symlink_archive,
+                                            dest_directory=chained_dst_dir,
+                                            strip_root=True)
+    assert os.path.exists(os.path.join(chained_dst_parent_dir, 'evil.txt')) is False
+
+
 def test_extract_zip_to_directory():
     src_temp_dir = tempfile.mkdtemp()
     dst_temp_dir = tempfile.mkdtemp()